@@ -2,65 +2,139 @@
 """ETL script to normalize raw property JSON into MySQL normalized schema."""
 
 import argparse
+import asyncio
 import os
-import json
-from datetime import datetime
-from typing import Optional, Dict, Any
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from datetime import date
+from functools import lru_cache
+from itertools import chain
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 
+import msgspec
+import numpy as np
+import orjson
 import pandas as pd
-from pydantic import BaseModel, ValidationError, validator
 from sqlalchemy import create_engine, MetaData, Table, Column, Integer, BigInteger, String, Numeric, Boolean, Date, Text, JSON
-from sqlalchemy import insert
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import TIMESTAMP, ForeignKey, Index, event, func, text
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
 from tqdm import tqdm
 from dotenv import load_dotenv
 
 
-class PropertyModel(BaseModel):
-    external_id: Optional[str]
-    address_line1: Optional[str]
-    address_line2: Optional[str]
-    city: Optional[str]
-    state: Optional[str]
-    postal_code: Optional[str]
-    county: Optional[str]
-    latitude: Optional[float]
-    longitude: Optional[float]
+class PropertyModel(msgspec.Struct):
+    external_id: Optional[str] = None
+    address_line1: Optional[str] = None
+    address_line2: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    postal_code: Optional[str] = None
+    county: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
-    bedrooms: Optional[int]
-    bathrooms: Optional[float]
-    sqft: Optional[int]
-    year_built: Optional[int]
-    property_type: Optional[str]
+    bedrooms: Optional[int] = None
+    bathrooms: Optional[float] = None
+    sqft: Optional[int] = None
+    year_built: Optional[int] = None
+    property_type: Optional[str] = None
 
-    has_hoa: Optional[bool]
-    hoa_name: Optional[str]
-    hoa_fee_amount: Optional[float]
-    hoa_fee_frequency: Optional[str]
+    has_hoa: Optional[bool] = None
+    hoa_name: Optional[str] = None
+    hoa_fee_amount: Optional[float] = None
+    hoa_fee_frequency: Optional[str] = None
 
-    valuation_source: Optional[str]
-    valuation_amount: Optional[float]
-    valuation_date: Optional[datetime]
+    valuation_source: Optional[str] = None
+    valuation_amount: Optional[float] = None
+    valuation_date: Optional[date] = None
 
-    rehab_estimate_total: Optional[float]
-    rehab_estimate_breakdown: Optional[Dict[str, Any]]
+    rehab_estimate_total: Optional[float] = None
+    rehab_estimate_breakdown: Optional[Dict[str, Any]] = None
 
-    other_attributes: Optional[Dict[str, Any]] = {}
+    other_attributes: Optional[Dict[str, Any]] = msgspec.field(default_factory=dict)
 
-    @validator('postal_code')
-    def postal_code_strip(cls, v):
-        if v is None:
-            return v
-        return str(v).strip()
+    def __post_init__(self):
+        if self.postal_code is not None:
+            self.postal_code = self.postal_code.strip()
 
 
-def load_field_config(excel_path: str) -> pd.DataFrame:
-    df = pd.read_excel(excel_path, engine='openpyxl')
+def validate_record(rec: Dict[str, Any]) -> Dict[str, Any]:
+    # Full validation for untrusted input (--strict); raises msgspec.ValidationError.
+    # strict=False allows the same lax coercions (e.g. "3" -> 3) Pydantic used to.
+    return msgspec.structs.asdict(msgspec.convert(rec, PropertyModel, strict=False))
+
+
+def read_field_config(excel_path: str) -> pd.DataFrame:
+    try:
+        df = pd.read_excel(excel_path, engine='calamine')
+    except (ImportError, ValueError):
+        # python-calamine missing, or a pandas release that predates the engine.
+        df = pd.read_excel(excel_path, engine='openpyxl')
     df.columns = [c.strip() for c in df.columns]
     return df
 
 
-def build_engine_from_env(env_path: Optional[str] = None):
+FIELD_CONFIG_CACHE_KEY = b'field_config_source'
+
+
+def load_field_config(excel_path: str, cache_dir: str = '.cache') -> pd.DataFrame:
+    # The parsed workbook is cached in cache_dir/field_config.parquet, with the
+    # (path, mtime) it was parsed from stored in the Parquet schema metadata, so
+    # an unchanged config is only parsed once and an edit replaces the cache.
+    key = f"{os.path.abspath(excel_path)}:{os.path.getmtime(excel_path)}".encode()
+    cache_path = os.path.join(cache_dir, 'field_config.parquet')
+    if os.path.exists(cache_path):
+        try:
+            import pyarrow.parquet as pq
+            table = pq.read_table(cache_path)
+            if (table.schema.metadata or {}).get(FIELD_CONFIG_CACHE_KEY) == key:
+                return table.to_pandas()
+        except ImportError:
+            pass  # no parquet engine (pyarrow) installed
+        except Exception:
+            # Truncated or corrupt cache file: treat as a miss and rebuild it.
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+    df = read_field_config(excel_path)
+    tmp_path = None
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        os.makedirs(cache_dir, exist_ok=True)
+        # Mixed-type columns are stored as strings; only str() of them is used.
+        out = df.copy()
+        for c in out.columns[out.dtypes == object]:
+            out[c] = out[c].where(out[c].isna(), out[c].astype(str))
+        table = pa.Table.from_pandas(out, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), FIELD_CONFIG_CACHE_KEY: key})
+        # Write to a temp file and rename it into place, so an interrupted write
+        # or a concurrent run never leaves a partial file under cache_path.
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.parquet')
+        os.close(fd)
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+    except Exception:
+        pass  # caching is best-effort
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    return df
+
+
+def json_dumps(obj) -> str:
+    # orjson for JSON columns. It returns bytes, but the drivers send bytes as
+    # binary strings, which MySQL refuses to cast to JSON, hence the decode.
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def engine_url_from_env(env_path: Optional[str], driver: str) -> str:
     if env_path and os.path.exists(env_path):
         load_dotenv(env_path)
     else:
@@ -70,162 +144,671 @@ def build_engine_from_env(env_path: Optional[str] = None):
     host = os.getenv('DB_HOST', '127.0.0.1')
     port = os.getenv('DB_PORT', '3306')
     db = os.getenv('DB_NAME', 'assessment_db')
-    engine_url = f"mysql+pymysql://{user}:{pw}@{host}:{port}/{db}?charset=utf8mb4"
-    engine = create_engine(engine_url, echo=False, future=True)
-    return engine
+    return f"mysql+{driver}://{user}:{pw}@{host}:{port}/{db}?charset=utf8mb4"
 
 
-def ensure_tables(engine):
-    with engine.begin() as conn:
-        conn.execute("""CREATE TABLE IF NOT EXISTS property (
-            property_id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            external_id VARCHAR(128) UNIQUE,
-            address_line1 VARCHAR(255),
-            address_line2 VARCHAR(255),
-            city VARCHAR(100),
-            state VARCHAR(100),
-            postal_code VARCHAR(20),
-            county VARCHAR(100),
-            latitude DECIMAL(9,6),
-            longitude DECIMAL(9,6),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )""")
-        conn.execute("""CREATE TABLE IF NOT EXISTS property_detail (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            property_id BIGINT NOT NULL,
-            bedrooms INT,
-            bathrooms DECIMAL(3,1),
-            sqft INT,
-            year_built INT,
-            property_type VARCHAR(100),
-            zoning VARCHAR(50)
-        )""")
-        conn.execute("""CREATE TABLE IF NOT EXISTS valuation (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            property_id BIGINT NOT NULL,
-            valuation_source VARCHAR(100),
-            valuation_amount DECIMAL(15,2),
-            valuation_date DATE,
-            notes TEXT
-        )""")
-        conn.execute("""CREATE TABLE IF NOT EXISTS hoa (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            property_id BIGINT NOT NULL,
-            has_hoa BOOLEAN,
-            hoa_name VARCHAR(255),
-            hoa_fee_amount DECIMAL(12,2),
-            hoa_fee_frequency VARCHAR(50)
-        )""")
-        conn.execute("""CREATE TABLE IF NOT EXISTS rehab_estimate (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            property_id BIGINT NOT NULL,
-            estimate_total DECIMAL(15,2),
-            estimate_breakdown JSON,
-            last_updated DATE
-        )""")
-        conn.execute("""CREATE TABLE IF NOT EXISTS property_attribute (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            property_id BIGINT NOT NULL,
-            attr_key VARCHAR(200),
-            attr_value TEXT
-        )""")
-
-
-def map_row_to_model(row: Dict[str, Any], field_config: pd.DataFrame) -> PropertyModel:
-    # Build a dict for PropertyModel based on field_config mapping if present.
-    mapped = {}
-    other = {}
-    for k, v in row.items():
-        # find mapping in field_config
-        matches = field_config[field_config['raw_field'].astype(str).str.lower() == k.lower()]
-        if not matches.empty:
-            target = matches.iloc[0]['target_column']
-            tbl = matches.iloc[0]['target_table']
-            key = str(target).strip()
-            # map based on simple rules we expect
-            mapped[key] = v
-        else:
-            other[k] = v
-    mapped['other_attributes'] = other
+def enable_bulk_session(engine):
+    # Standard bulk-load session settings. Batches already run in explicit
+    # transactions, so autocommit needs no change.
+    @event.listens_for(engine, 'connect')
+    def _bulk_session(dbapi_conn, _):
+        cur = dbapi_conn.cursor()
+        cur.execute("SET unique_checks = 0, foreign_key_checks = 0")
+        cur.close()
+
+
+def build_engine_from_env(env_path: Optional[str] = None, bulk_session: bool = False):
     try:
-        pm = PropertyModel(**mapped)
-    except ValidationError as e:
-        raise e
-    return pm
+        import MySQLdb  # noqa: F401  mysqlclient C extension, faster than pymysql for large batches
+        driver = 'mysqldb'
+    except ImportError:
+        driver = 'pymysql'
+    engine_url = engine_url_from_env(env_path, driver)
+    # The load runs on a single connection, one transaction per batch.
+    # executemany_mode is a psycopg2 option; mysqlclient and pymysql already
+    # fold executemany() INSERTs into multi-row statements on their own.
+    engine = create_engine(engine_url, echo=False, future=True, pool_size=1, pool_pre_ping=False,
+                           connect_args={'local_infile': 1}, json_serializer=json_dumps)
+    if bulk_session:
+        enable_bulk_session(engine)
+    return engine
+
+
+def build_async_engine_from_env(env_path: Optional[str] = None, bulk_session: bool = False,
+                                pool_size: int = 4):
+    # asyncmy rather than aiomysql: its executemany() emits multi-row INSERTs.
+    engine = create_async_engine(engine_url_from_env(env_path, 'asyncmy'), echo=False, pool_size=pool_size,
+                                 pool_pre_ping=False, json_serializer=json_dumps)
+    if bulk_session:
+        enable_bulk_session(engine.sync_engine)
+    return engine
+
+
+metadata = MetaData()
+
+property_table = Table(
+    'property', metadata,
+    Column('property_id', BigInteger, primary_key=True, autoincrement=True),
+    Column('external_id', String(128), unique=True),
+    Column('address_line1', String(255)),
+    Column('address_line2', String(255)),
+    Column('city', String(100)),
+    Column('state', String(100)),
+    Column('postal_code', String(20)),
+    Column('county', String(100)),
+    Column('latitude', Numeric(9, 6)),
+    Column('longitude', Numeric(9, 6)),
+    Column('created_at', TIMESTAMP, server_default=func.current_timestamp()),
+)
+
+property_detail_table = Table(
+    'property_detail', metadata,
+    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('property_id', BigInteger, ForeignKey('property.property_id', ondelete='CASCADE'), nullable=False),
+    Column('bedrooms', Integer),
+    Column('bathrooms', Numeric(3, 1)),
+    Column('sqft', Integer),
+    Column('year_built', Integer),
+    Column('property_type', String(100)),
+    Column('zoning', String(50)),
+)
+
+valuation_table = Table(
+    'valuation', metadata,
+    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('property_id', BigInteger, ForeignKey('property.property_id', ondelete='CASCADE'), nullable=False),
+    Column('valuation_source', String(100)),
+    Column('valuation_amount', Numeric(15, 2)),
+    Column('valuation_date', Date),
+    Column('notes', Text),
+)
 
+hoa_table = Table(
+    'hoa', metadata,
+    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('property_id', BigInteger, ForeignKey('property.property_id', ondelete='CASCADE'), nullable=False),
+    Column('has_hoa', Boolean),
+    Column('hoa_name', String(255)),
+    Column('hoa_fee_amount', Numeric(12, 2)),
+    Column('hoa_fee_frequency', String(50)),
+)
 
-def insert_property(conn, engine, pm: PropertyModel):
-    # Insert into property table and related tables. Return property_id.
+rehab_estimate_table = Table(
+    'rehab_estimate', metadata,
+    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('property_id', BigInteger, ForeignKey('property.property_id', ondelete='CASCADE'), nullable=False),
+    Column('estimate_total', Numeric(15, 2)),
+    # none_as_null: a missing breakdown is SQL NULL (as --bulk writes it), not JSON 'null'.
+    Column('estimate_breakdown', JSON(none_as_null=True)),
+    Column('last_updated', Date),
+)
+
+property_attribute_table = Table(
+    'property_attribute', metadata,
+    Column('id', BigInteger, primary_key=True, autoincrement=True),
+    Column('property_id', BigInteger, ForeignKey('property.property_id', ondelete='CASCADE'), nullable=False),
+    Column('attr_key', String(200)),
+    Column('attr_value', Text),
+    Index('idx_attr_key', 'attr_key'),
+)
+
+# Statements are built once at import; SQLAlchemy's compiled cache then reuses
+# the compiled SQL for every batch instead of re-rendering it. The multi-row
+# property INSERT is the exception; see property_insert_sql.
+PROPERTY_DETAIL_INSERT = property_detail_table.insert()
+VALUATION_INSERT = valuation_table.insert()
+HOA_INSERT = hoa_table.insert()
+REHAB_ESTIMATE_INSERT = rehab_estimate_table.insert()
+PROPERTY_ATTRIBUTE_INSERT = property_attribute_table.insert()
+LAST_INSERT_ID = text("SELECT LAST_INSERT_ID()")
+MAX_PROPERTY_ID = text("SELECT COALESCE(MAX(property_id), 0) FROM property")
+
+# Named lock serializing --bulk id reservation across connections and workers.
+PROPERTY_ID_LOCK = 'etl_property_ids'
+ID_LOCK_TIMEOUT = 600
+GET_ID_LOCK = text("SELECT GET_LOCK(:name, :timeout)")
+RELEASE_ID_LOCK = text("SELECT RELEASE_LOCK(:name)")
+
+# Secondary indexes that --defer-indexes drops before the load and rebuilds after:
+# (table, index name, ALTER TABLE clause that recreates it). Non-unique indexes
+# come first, so a UNIQUE rebuild failing on duplicates cannot hold them up.
+DEFERRED_INDEXES = [
+    (property_attribute_table, 'idx_attr_key', 'ADD INDEX idx_attr_key (attr_key)'),
+    (property_table, 'external_id', 'ADD UNIQUE KEY external_id (external_id)'),
+]
+INDEX_EXISTS = text("SELECT COUNT(*) FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index")
+
+
+def drop_secondary_indexes(engine):
     with engine.begin() as conn:
-        # property core
-        prop_ins = insert(conn.table_names) if False else None  # placeholder to keep linter quiet
-    # We'll use raw SQL for simplicity
+        for table, index, _ in DEFERRED_INDEXES:
+            if conn.execute(INDEX_EXISTS, {'table': table.name, 'index': index}).scalar():
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} DROP INDEX {index}")
+
+
+def restore_secondary_indexes(engine) -> List[str]:
+    """Recreate every DEFERRED_INDEXES entry that is missing.
+
+    This includes indexes an earlier interrupted run dropped and never rebuilt.
+    Each index is rebuilt on its own; failures are reported rather than raised,
+    and the names of the indexes still missing are returned.
+    """
+    missing = []
+    for table, index, clause in DEFERRED_INDEXES:
+        try:
+            with engine.begin() as conn:
+                if not conn.execute(INDEX_EXISTS, {'table': table.name, 'index': index}).scalar():
+                    conn.exec_driver_sql(f"ALTER TABLE {table.name} {clause}")
+        except Exception as e:
+            missing.append(f"{table.name}.{index}")
+            reason = db_error(e)
+            if 'UNIQUE' in clause:
+                # The unique key is named after its column.
+                try:
+                    with engine.connect() as conn:
+                        dupes = conn.exec_driver_sql(
+                            f"SELECT COUNT(*) FROM (SELECT {index} FROM {table.name} WHERE {index} IS NOT NULL "
+                            f"GROUP BY {index} HAVING COUNT(*) > 1) d").scalar()
+                    reason = f"{dupes} duplicated {index} value(s); {reason}"
+                except Exception:
+                    pass
+            print(f"Warning: could not rebuild index {table.name}.{index}: {reason}")
+    return missing
+
+
+def autoinc_ids_consecutive(engine) -> bool:
+    # A multi-row INSERT is only guaranteed a consecutive id range with
+    # innodb_autoinc_lock_mode 0 (traditional) or 1 (consecutive). Mode 2
+    # (interleaved, the MySQL 8 default) may interleave ids with other
+    # sessions inserting into the same table at the same time.
     with engine.connect() as conn:
-        res = conn.execute(
-            """INSERT INTO property (external_id,address_line1,address_line2,city,state,postal_code,county,latitude,longitude)
-               VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)""",
-            (pm.external_id, pm.address_line1, pm.address_line2, pm.city, pm.state, pm.postal_code, pm.county,
-             pm.latitude, pm.longitude)
-        )
-        # Get last insert id
-        prop_id = conn.execute("SELECT LAST_INSERT_ID()").scalar()
-        # property_detail
-        conn.execute(
-            """INSERT INTO property_detail (property_id,bedrooms,bathrooms,sqft,year_built,property_type,zoning)
-               VALUES (%s,%s,%s,%s,%s,%s,%s)""",
-            (prop_id, pm.bedrooms, pm.bathrooms, pm.sqft, pm.year_built, pm.property_type, None)
+        mode = conn.execute(text("SELECT @@innodb_autoinc_lock_mode")).scalar()
+    return mode is not None and int(mode) <= 1
+
+
+def iter_records(json_path: str) -> Iterator[Dict[str, Any]]:
+    # One JSON object per line, parsed lazily with orjson.
+    with open(json_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def iter_frames(json_path: str, size: int) -> Iterator[pd.DataFrame]:
+    # dtype=object keeps JSON ints as ints in columns that also have missing values.
+    records = []
+    for rec in iter_records(json_path):
+        records.append(rec)
+        if len(records) >= size:
+            yield pd.DataFrame(records, dtype=object)
+            records = []
+    if records:
+        yield pd.DataFrame(records, dtype=object)
+
+
+def build_field_map(field_config: pd.DataFrame) -> Dict[str, Tuple[str, Any]]:
+    # raw_field (lowercased) -> (target_column, target_table); the first row wins for duplicate raw fields.
+    field_map = {}
+    for r in field_config.itertuples(index=False):
+        field_map.setdefault(str(r.raw_field).lower(), (str(r.target_column).strip(), r.target_table))
+    return field_map
+
+
+MODEL_COLUMNS = [f for f in PropertyModel.__struct_fields__ if f != 'other_attributes']
+
+
+def nulls_to_none(df: pd.DataFrame) -> pd.DataFrame:
+    # NaN/NaT/NA -> None so the drivers send NULL.
+    return df.astype(object).where(df.notna(), None)
+
+
+def map_frame(df: pd.DataFrame, field_map: Dict[str, Tuple[str, Any]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Split a raw frame into the model columns (renamed from the field config in
+    # one pass) and the unmapped fields, which become property_attribute rows.
+    rename_map = {raw: target for raw, (target, _) in field_map.items()}
+    df.columns = df.columns.str.lower()
+    mapped_cols = [c for c in df.columns if c in rename_map]
+    other_cols = [c for c in df.columns if c not in rename_map]
+    mapped_df = df[mapped_cols].rename(columns=rename_map)
+    mapped_df = mapped_df.loc[:, ~mapped_df.columns.duplicated()].reindex(columns=MODEL_COLUMNS)
+    return nulls_to_none(mapped_df), df[other_cols]
+
+
+STRING_COLUMNS = ['external_id', 'address_line1', 'address_line2', 'city', 'state', 'postal_code', 'county',
+                  'property_type', 'hoa_name', 'hoa_fee_frequency', 'valuation_source']
+FLOAT_COLUMNS = ['latitude', 'longitude', 'bathrooms', 'hoa_fee_amount', 'valuation_amount', 'rehab_estimate_total']
+INT_COLUMNS = ['bedrooms', 'sqft', 'year_built']
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+BOOL_VALUES = {'true': True, 'false': False, 'yes': True, 'no': False, 'y': True, 'n': False, '1': True, '0': False}
+
+
+def clean_frame(mapped_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Column-wise equivalents of the PropertyModel coercions; values that do not
+    # parse become NULL. Also returns a mask of the non-null inputs that were
+    # nulled that way, so --strict can reject those rows instead.
+    present = mapped_df.notna()
+    for c in STRING_COLUMNS:
+        mapped_df[c] = mapped_df[c].astype('string').str.strip().replace('', pd.NA)
+    for c in FLOAT_COLUMNS:
+        mapped_df[c] = pd.to_numeric(mapped_df[c], errors='coerce')
+    for c in INT_COLUMNS:
+        num = pd.to_numeric(mapped_df[c], errors='coerce')
+        # Fractional or out-of-range (INT column) numbers count as unparseable.
+        mapped_df[c] = num.where((num % 1 == 0) & num.between(INT_MIN, INT_MAX)).astype('Int64')
+    mapped_df['has_hoa'] = mapped_df['has_hoa'].astype('string').str.strip().str.lower().map(BOOL_VALUES)
+    mapped_df['valuation_date'] = parse_dates(mapped_df['valuation_date'])
+    # Blank strings becoming NULL is normalization, not a parse failure.
+    coerced = (present & mapped_df.isna()).drop(columns=STRING_COLUMNS)
+    return mapped_df, coerced
+
+
+def _to_date(v) -> Optional[date]:
+    ts = pd.to_datetime(v, errors='coerce')
+    return None if pd.isna(ts) else ts.date()
+
+
+def parse_dates(s: pd.Series) -> pd.Series:
+    # Nested JSON values (dicts, lists) are never dates and are not hashable.
+    s = s.where(~s.map(lambda v: isinstance(v, (dict, list))), None)
+    try:
+        # format='mixed' infers the format of each element separately.
+        parsed = pd.to_datetime(s, errors='coerce', format='mixed')
+    except ValueError:
+        # Mixed UTC offsets (or aware and naive values) cannot share a
+        # datetime64 column; parse each distinct value on its own instead.
+        return s.map({v: _to_date(v) for v in s.dropna().unique()})
+    return parsed.dt.date.where(parsed.notna(), None)
+
+
+BATCH = 10000
+
+PROPERTY_COLUMNS = ['external_id', 'address_line1', 'address_line2', 'city', 'state', 'postal_code', 'county',
+                    'latitude', 'longitude']
+DETAIL_COLUMNS = ['bedrooms', 'bathrooms', 'sqft', 'year_built', 'property_type']
+VALUATION_COLUMNS = ['valuation_source', 'valuation_amount', 'valuation_date']
+HOA_COLUMNS = ['has_hoa', 'hoa_name', 'hoa_fee_amount', 'hoa_fee_frequency']
+
+
+def attr_value(v) -> str:
+    # Nested values are stored as JSON text.
+    if isinstance(v, (dict, list)):
+        return json_dumps(v)
+    return str(v)
+
+
+def stage_tables(mapped_df: pd.DataFrame, attr_df: pd.DataFrame) -> List[Tuple[Table, Any, pd.DataFrame]]:
+    """Project a mapped batch into one DataFrame per target table.
+
+    Returns (table, insert statement, rows) with property first; its statement
+    is None, as insert_batch renders it per row count (property_insert_sql).
+    property_id holds each row's position in the batch until the writer knows
+    the real ids.
+    """
+    frame = mapped_df.reset_index(drop=True)
+    pos = np.arange(len(frame))
+    frame.insert(0, 'property_id', pos)
+
+    prop = frame[['property_id'] + PROPERTY_COLUMNS]
+    detail = frame[['property_id'] + DETAIL_COLUMNS].assign(zoning=None)
+
+    has_valuation = frame['valuation_amount'].notna() | frame['valuation_source'].notna()
+    valuation = frame.loc[has_valuation, ['property_id'] + VALUATION_COLUMNS].assign(notes=None)
+
+    has_hoa = frame['has_hoa'].notna() | frame['hoa_name'].notna()
+    hoa = frame.loc[has_hoa, ['property_id'] + HOA_COLUMNS]
+
+    breakdown = frame['rehab_estimate_breakdown']
+    has_breakdown = breakdown.astype(bool)
+    rehab = pd.DataFrame({
+        'property_id': frame['property_id'],
+        'estimate_total': frame['rehab_estimate_total'],
+        # The JSON column type serializes the breakdown itself.
+        'estimate_breakdown': breakdown.where(has_breakdown, None),
+        'last_updated': None,
+    })[frame['rehab_estimate_total'].notna() | has_breakdown]
+
+    # Long (property_id, attr_key, attr_value) form of every non-null unmapped field.
+    attrs = (attr_df.reset_index(drop=True).assign(property_id=pos)
+             .melt(id_vars='property_id', var_name='attr_key', value_name='attr_value')
+             .dropna(subset=['attr_value']))
+    attrs['attr_key'] = attrs['attr_key'].astype(str)
+    attrs['attr_value'] = attrs['attr_value'].map(attr_value)
+
+    return [(property_table, None, prop),
+            (property_detail_table, PROPERTY_DETAIL_INSERT, detail),
+            (valuation_table, VALUATION_INSERT, valuation),
+            (hoa_table, HOA_INSERT, hoa),
+            (rehab_estimate_table, REHAB_ESTIMATE_INSERT, rehab),
+            (property_attribute_table, PROPERTY_ATTRIBUTE_INSERT, attrs)]
+
+
+@lru_cache(maxsize=16)
+def property_insert_sql(n: int) -> str:
+    # A multi-row insert().values() statement has no cache key, so SQLAlchemy
+    # would recompile it for every batch; the SQL only depends on the row count.
+    row = '(' + ','.join(['%s'] * len(PROPERTY_COLUMNS)) + ')'
+    return f"INSERT INTO property ({','.join(PROPERTY_COLUMNS)}) VALUES " + ','.join([row] * n)
+
+
+def insert_batch(conn, staged: List[Tuple[Table, Any, pd.DataFrame]]):
+    # One multi-row INSERT per table; the caller owns the transaction.
+    _, _, prop = staged[0]
+    n = len(prop)
+    # Rendered as one multi-row INSERT ... VALUES so that MySQL hands out
+    # consecutive auto-increment ids starting at LAST_INSERT_ID(); one
+    # SELECT per batch then yields the property_id of every row.
+    params = tuple(chain.from_iterable(prop[PROPERTY_COLUMNS].itertuples(index=False, name=None)))
+    res = conn.exec_driver_sql(property_insert_sql(n), params)
+    if res.rowcount != n:
+        raise RuntimeError(f"expected {n} property rows to be inserted, got {res.rowcount}")
+    first_id = conn.execute(LAST_INSERT_ID).scalar()
+    for _, stmt, rows in staged[1:]:
+        if rows.empty:
+            continue
+        rows = rows.assign(property_id=rows['property_id'] + first_id)
+        # executemany; the MySQL drivers rewrite this into multi-row INSERTs.
+        conn.execute(stmt, rows.to_dict(orient='records'))
+
+
+def _csv_value(v) -> str:
+    # LOAD DATA reads an unquoted NULL as SQL NULL; everything else is quoted
+    # with embedded quotes doubled (ESCAPED BY '' keeps backslashes literal).
+    if v is None:
+        return 'NULL'
+    if isinstance(v, bool):
+        v = int(v)
+    elif isinstance(v, (dict, list)):
+        v = attr_value(v)
+    return '"' + str(v).replace('"', '""') + '"'
+
+
+def load_data_infile(conn, table: Table, rows: pd.DataFrame):
+    # Stream rows to the server through a temp CSV and LOAD DATA LOCAL INFILE.
+    columns = list(rows.columns)
+    fd, path = tempfile.mkstemp(prefix=f"{table.name}_", suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            for r in rows.itertuples(index=False, name=None):
+                f.write(','.join([_csv_value(v) for v in r]))
+                f.write('\n')
+        infile = path.replace('\\', '/').replace("'", "\\'")
+        res = conn.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE '{infile}' INTO TABLE {table.name} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' ENCLOSED BY '\"' ESCAPED BY '' LINES TERMINATED BY '\\n' "
+            f"({','.join(columns)})"
         )
-        # valuation
-        if pm.valuation_amount is not None or pm.valuation_source is not None:
-            val_date = pm.valuation_date.date() if pm.valuation_date else None
-            conn.execute(
-                """INSERT INTO valuation (property_id,valuation_source,valuation_amount,valuation_date,notes)
-                   VALUES (%s,%s,%s,%s,%s)""",
-                (prop_id, pm.valuation_source, pm.valuation_amount, val_date, None)
-            )
-        # hoa
-        if pm.has_hoa is not None or pm.hoa_name is not None:
-            conn.execute(
-                """INSERT INTO hoa (property_id,has_hoa,hoa_name,hoa_fee_amount,hoa_fee_frequency)
-                   VALUES (%s,%s,%s,%s,%s)""",
-                (prop_id, pm.has_hoa, pm.hoa_name, pm.hoa_fee_amount, pm.hoa_fee_frequency)
-            )
-        # rehab_estimate
-        if pm.rehab_estimate_total is not None or pm.rehab_estimate_breakdown:
-            breakdown_json = json.dumps(pm.rehab_estimate_breakdown) if pm.rehab_estimate_breakdown else None
-            conn.execute(
-                """INSERT INTO rehab_estimate (property_id,estimate_total,estimate_breakdown,last_updated)
-                   VALUES (%s,%s,%s,%s)""",
-                (prop_id, pm.rehab_estimate_total, breakdown_json, None)
-            )
-        # other attributes
-        for k, v in (pm.other_attributes or {}).items():
-            conn.execute(
-                """INSERT INTO property_attribute (property_id,attr_key,attr_value)
-                   VALUES (%s,%s,%s)""",
-                (prop_id, str(k), json.dumps(v) if isinstance(v, (dict, list)) else str(v))
-            )
-    return prop_id
+        # LOCAL implies IGNORE: duplicate-key rows are skipped with a warning
+        # rather than failing, so a short count has to roll the batch back.
+        if res.rowcount != len(rows):
+            raise RuntimeError(f"expected {len(rows)} {table.name} rows to be loaded, got {res.rowcount}")
+    finally:
+        os.remove(path)
+
+
+def bulk_load_batch(conn, staged: List[Tuple[Table, Any, pd.DataFrame]]):
+    """Load a staged batch with LOAD DATA LOCAL INFILE instead of INSERT.
+
+    property_id values are assigned client-side, numbering the batch after the
+    current highest property_id, so child rows can be written with their final
+    ids. The caller must hold PROPERTY_ID_LOCK until the batch commits.
+    """
+    last_id = conn.execute(MAX_PROPERTY_ID).scalar()
+    first_id = last_id + 1
+    for table, _, rows in staged:
+        if rows.empty:
+            continue
+        load_data_infile(conn, table, rows.assign(property_id=rows['property_id'] + first_id))
+
+
+def bulk_load_locked(conn, staged: List[Tuple[Table, Any, pd.DataFrame]]):
+    # Reading MAX(property_id) and loading after it must not interleave with
+    # another --bulk batch (e.g. from another worker); row and gap locks cannot
+    # guarantee that, so batches take turns under a MySQL named lock.
+    acquired = conn.execute(GET_ID_LOCK, {'name': PROPERTY_ID_LOCK, 'timeout': ID_LOCK_TIMEOUT}).scalar()
+    conn.commit()  # the named lock belongs to the session, not the transaction
+    if acquired != 1:
+        raise TimeoutError(f"timed out waiting for the {PROPERTY_ID_LOCK} lock")
+    try:
+        bulk_load_batch(conn, staged)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(RELEASE_ID_LOCK, {'name': PROPERTY_ID_LOCK})
+        conn.commit()
+
+
+def validate_frame(mapped_df: pd.DataFrame, attr_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+    # --strict: run every row through PropertyModel and keep the ones that pass.
+    valid, index = [], []
+    for i, rec in zip(mapped_df.index, mapped_df.to_dict(orient='records')):
+        try:
+            valid.append(validate_record(rec))
+        except msgspec.ValidationError as e:
+            print(f"Failed to process row due to: {e}")
+            continue
+        index.append(i)
+    checked = nulls_to_none(pd.DataFrame(valid, index=index, columns=MODEL_COLUMNS, dtype=object))
+    return checked, attr_df.loc[index], len(mapped_df) - len(index)
+
+
+def prepare_frame(mapped_df: pd.DataFrame, attr_df: pd.DataFrame,
+                  strict: bool) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+    # Clean a mapped batch; under --strict, drop rows with values that failed to
+    # parse or that fail PropertyModel. Returns (mapped, attributes, failed rows).
+    original = mapped_df.copy() if strict else None
+    mapped_df, coerced = clean_frame(mapped_df)
+    mapped_df = nulls_to_none(mapped_df)
+    if not strict:
+        return mapped_df, attr_df, 0
+    bad = coerced.any(axis=1)
+    for i in mapped_df.index[bad]:
+        cols = coerced.columns[coerced.loc[i]]
+        values = ', '.join(f"{c}={original.at[i, c]!r}" for c in cols)
+        print(f"Failed to process row due to: invalid value(s) {values}")
+    mapped_df, attr_df, failed = validate_frame(mapped_df[~bad], attr_df[~bad])
+    return mapped_df, attr_df, failed + int(bad.sum())
+
+
+# Errors caused by the rows themselves (duplicate keys, values the column
+# rejects, rows LOAD DATA skipped); retrying a smaller part of the batch helps.
+ROW_ERRORS = (DataError, IntegrityError, RuntimeError)
+
+
+def db_error(e: Exception) -> Exception:
+    # The driver's own error; SQLAlchemy's message also repeats the whole
+    # multi-row statement.
+    return getattr(e, 'orig', None) or e
+
+
+def write_batch(mapped_df: pd.DataFrame, attr_df: pd.DataFrame, engine, bulk: bool = False) -> int:
+    """Write a prepared batch in one transaction; returns the number of failed rows.
+
+    When the database rejects the batch because of its rows, it is split in
+    halves and each half retried in its own transaction, so only the offending
+    rows are counted as failed.
+    """
+    try:
+        staged = stage_tables(mapped_df, attr_df)
+        if bulk:
+            with engine.connect() as conn:
+                bulk_load_locked(conn, staged)
+        else:
+            with engine.begin() as conn:
+                insert_batch(conn, staged)
+        return 0
+    except ROW_ERRORS as e:
+        if len(mapped_df) == 1:
+            print(f"Failed to process row due to: {db_error(e)}")
+            return 1
+    except Exception as e:
+        print(f"Failed to write batch of {len(mapped_df)} rows due to: {db_error(e)}")
+        return len(mapped_df)
+    half = len(mapped_df) // 2
+    return (write_batch(mapped_df.iloc[:half], attr_df.iloc[:half], engine, bulk)
+            + write_batch(mapped_df.iloc[half:], attr_df.iloc[half:], engine, bulk))
+
+
+def load_frame(mapped_df: pd.DataFrame, attr_df: pd.DataFrame, engine, strict: bool = False,
+               bulk: bool = False) -> int:
+    # Clean and write one mapped batch; returns the number of failed rows.
+    n = len(mapped_df)
+    try:
+        mapped_df, attr_df, failed = prepare_frame(mapped_df, attr_df, strict)
+    except Exception as e:
+        print(f"Failed to process batch of {n} rows due to: {e}")
+        return n
+    if mapped_df.empty:
+        return failed
+    return failed + write_batch(mapped_df, attr_df, engine, bulk)
+
+
+async def write_batch_async(mapped_df: pd.DataFrame, attr_df: pd.DataFrame, engine) -> int:
+    # Async counterpart of write_batch, splitting a rejected batch the same way.
+    loop = asyncio.get_running_loop()
+    try:
+        staged = await loop.run_in_executor(None, stage_tables, mapped_df, attr_df)
+        async with engine.begin() as conn:
+            await conn.run_sync(insert_batch, staged)
+        return 0
+    except ROW_ERRORS as e:
+        if len(mapped_df) == 1:
+            print(f"Failed to process row due to: {db_error(e)}")
+            return 1
+    except Exception as e:
+        print(f"Failed to write batch of {len(mapped_df)} rows due to: {db_error(e)}")
+        return len(mapped_df)
+    half = len(mapped_df) // 2
+    return (await write_batch_async(mapped_df.iloc[:half], attr_df.iloc[:half], engine)
+            + await write_batch_async(mapped_df.iloc[half:], attr_df.iloc[half:], engine))
+
+
+async def load_frame_async(mapped_df: pd.DataFrame, attr_df: pd.DataFrame, engine, strict: bool = False) -> int:
+    # Async counterpart of load_frame; insert_batch runs unchanged through run_sync.
+    # Cleaning and staging are CPU-bound, so they run in a thread to keep the
+    # event loop free for the other batches' network I/O.
+    loop = asyncio.get_running_loop()
+    n = len(mapped_df)
+    try:
+        mapped_df, attr_df, failed = await loop.run_in_executor(None, prepare_frame, mapped_df, attr_df, strict)
+    except Exception as e:
+        print(f"Failed to process batch of {n} rows due to: {e}")
+        return n
+    if mapped_df.empty:
+        return failed
+    return failed + await write_batch_async(mapped_df, attr_df, engine)
+
+
+_worker_engine = None
+
+
+def _init_worker(env_path: Optional[str], bulk_session: bool):
+    # Engines and their pooled connections must not cross a fork; each worker builds its own.
+    global _worker_engine
+    _worker_engine = build_engine_from_env(env_path, bulk_session=bulk_session)
+
+
+def _load_chunk(mapped_df: pd.DataFrame, attr_df: pd.DataFrame, strict: bool, bulk: bool) -> int:
+    return load_frame(mapped_df, attr_df, _worker_engine, strict=strict, bulk=bulk)
 
 
 def main(args):
-    field_config = load_field_config(args.excel)
-    engine = build_engine_from_env(args.env)
-    ensure_tables(engine)
+    field_map = build_field_map(load_field_config(args.excel))
+    engine = build_engine_from_env(args.env, bulk_session=args.defer_indexes)
+    if args.init_db:
+        # CREATE TABLE for whichever of the tables above are missing.
+        metadata.create_all(engine)
+    workers = max(1, args.workers)
+    in_flight = max(1, args.in_flight) if args.async_io else 1
+    if not autoinc_ids_consecutive(engine):
+        if (workers > 1 or in_flight > 1) and not args.bulk:
+            print("Warning: innodb_autoinc_lock_mode=2 does not keep concurrent multi-row INSERT ids "
+                  "consecutive; falling back to one batch at a time.")
+            workers = in_flight = 1
+        else:
+            print("Warning: innodb_autoinc_lock_mode=2; child rows are linked by id range, "
+                  "so nothing else may insert into property while the ETL runs.")
+
+    if args.defer_indexes:
+        drop_secondary_indexes(engine)
+    try:
+        if args.async_io:
+            processed, failed = asyncio.run(load_json_async(args, field_map, in_flight))
+        else:
+            processed, failed = load_json(args, engine, field_map, workers)
+    finally:
+        if args.defer_indexes:
+            print("Rebuilding secondary indexes...")
+            missing = restore_secondary_indexes(engine)
+            if missing:
+                print(f"Warning: indexes still missing: {', '.join(missing)}; "
+                      "fix the data and rerun with --defer-indexes to rebuild them.")
+    print(f"Completed. Processed {processed} rows from {args.json}. Failed rows: {failed}")
 
-    # Load JSON
-    df = pd.read_json(args.json, lines=True)
-    print(f"Loaded {len(df)} records from {args.json}")
+
+def load_json(args, engine, field_map: Dict[str, Tuple[str, Any]], workers: int) -> Tuple[int, int]:
+    # Returns (rows processed, rows failed).
+    # Stream the JSON lines in BATCH-sized frames so memory stays flat regardless of file size.
+    frames = (map_frame(df, field_map) for df in iter_frames(args.json, BATCH))
     failed = 0
+    progress = tqdm(desc='Processing', unit='rows')
+    if workers == 1:
+        for mapped_df, attr_df in frames:
+            failed += load_frame(mapped_df, attr_df, engine, strict=args.strict, bulk=args.bulk)
+            progress.update(len(mapped_df))
+    else:
+        # Rows share no state, so disjoint batches load independently. At most
+        # two batches per worker are queued to keep memory bounded.
+        engine.dispose()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(args.env, args.defer_indexes)) as pool:
+            pending = {}
 
-    for _, row in tqdm(df.iterrows(), total=len(df), desc='Processing'):
+            def collect(done):
+                nonlocal failed
+                for fut in done:
+                    failed += fut.result()
+                    progress.update(pending.pop(fut))
+
+            for mapped_df, attr_df in frames:
+                if len(pending) >= 2 * workers:
+                    collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                pending[pool.submit(_load_chunk, mapped_df, attr_df, args.strict, args.bulk)] = len(mapped_df)
+            collect(list(as_completed(pending)))
+    progress.close()
+    return progress.n, failed
+
+
+async def load_json_async(args, field_map: Dict[str, Tuple[str, Any]], in_flight: int) -> Tuple[int, int]:
+    # Overlap batch building with network round-trips: up to in_flight batches
+    # are being written, each on its own connection, while the next one is mapped.
+    engine = build_async_engine_from_env(args.env, bulk_session=args.defer_indexes, pool_size=in_flight)
+    slots = asyncio.Semaphore(in_flight)
+    progress = tqdm(desc='Processing', unit='rows')
+
+    async def write(mapped_df: pd.DataFrame, attr_df: pd.DataFrame) -> int:
         try:
-            pm = map_row_to_model(row.to_dict(), field_config)
-            insert_property(None, engine, pm)
-        except Exception as e:
-            failed += 1
-            print(f"Failed to process row due to: {e}")
-    print(f"Completed. Failed rows: {failed}")
+            return await load_frame_async(mapped_df, attr_df, engine, strict=args.strict)
+        finally:
+            slots.release()
+            progress.update(len(mapped_df))
+
+    # Reading and mapping the next batch runs in a thread; on the loop it would
+    # block the pending writes, since acquire() does not yield while slots are free.
+    loop = asyncio.get_running_loop()
+    frames = (map_frame(df, field_map) for df in iter_frames(args.json, BATCH))
+    tasks = []
+    try:
+        while (frame := await loop.run_in_executor(None, next, frames, None)) is not None:
+            await slots.acquire()
+            tasks.append(asyncio.create_task(write(*frame)))
+        failed = sum(await asyncio.gather(*tasks))
+    finally:
+        await engine.dispose()
+        progress.close()
+    return progress.n, failed
 
 
 if __name__ == '__main__':
@@ -233,5 +816,22 @@ if __name__ == '__main__':
     parser.add_argument('--json', required=True, help='Path to properties.json')
     parser.add_argument('--excel', required=True, help='Path to Field Config.xlsx')
     parser.add_argument('--env', default='.env', help='Path to .env file')
+    parser.add_argument('--init-db', action='store_true', help='Create any missing tables before loading')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Load tables with LOAD DATA LOCAL INFILE (server must allow local_infile)')
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help='Drop secondary indexes and disable unique/foreign key checks during the load, '
+                             'then rebuild the indexes')
+    parser.add_argument('--async', dest='async_io', action='store_true',
+                        help='Write batches over asyncio (asyncmy driver), overlapping network waits with mapping')
+    parser.add_argument('--in-flight', type=int, default=4, help='Batches written concurrently with --async')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes loading in parallel')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--trusted', dest='strict', action='store_false',
+                      help='Skip row validation and rely on the DB schema constraints (default)')
+    mode.add_argument('--strict', dest='strict', action='store_true',
+                      help='Validate every row with PropertyModel before loading')
     args = parser.parse_args()
+    if args.async_io and (args.bulk or args.workers > 1):
+        parser.error('--async cannot be combined with --bulk or --workers')
     main(args)